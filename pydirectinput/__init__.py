@@ -1,6 +1,7 @@
 import ctypes
 import functools
 import inspect
+import itertools
 import time
 
 SendInput = ctypes.windll.user32.SendInput
@@ -11,6 +12,13 @@ MapVirtualKey = ctypes.windll.user32.MapVirtualKeyW
 FAILSAFE = True
 FAILSAFE_POINTS = [(0, 0)]
 PAUSE = 0.1  # Tenth-second pause by default.
+# "after": sleep for PAUSE after every call (same as PyAutoGUI).
+# "overlap": start the PAUSE clock when the call starts, so the time spent sending the input counts towards it and
+# only what is left of PAUSE is slept afterwards. Useful for scripts doing many calls in a row.
+PAUSE_MODE = "after"
+
+# Inputs queued up by beginBatch() until endBatch() sends them. None when no batch is open.
+_batch_buffer = None
 
 # Constants for the mouse button names
 LEFT = "left"
@@ -32,6 +40,32 @@ MOUSEEVENTF_MIDDLEDOWN = 0x0020
 MOUSEEVENTF_MIDDLEUP = 0x0040
 MOUSEEVENTF_MIDDLECLICK = MOUSEEVENTF_MIDDLEDOWN + MOUSEEVENTF_MIDDLEUP
 
+# The event each mouse button name sends, one table per action. They are keyed by the button name itself, so a lookup
+# with one of the constants above hits on an identity compare with the string's cached hash.
+_MOUSE_DOWN_EVENTS = {
+    PRIMARY: MOUSEEVENTF_LEFTDOWN,
+    LEFT: MOUSEEVENTF_LEFTDOWN,
+    MIDDLE: MOUSEEVENTF_MIDDLEDOWN,
+    SECONDARY: MOUSEEVENTF_RIGHTDOWN,
+    RIGHT: MOUSEEVENTF_RIGHTDOWN,
+}
+_MOUSE_UP_EVENTS = {
+    PRIMARY: MOUSEEVENTF_LEFTUP,
+    LEFT: MOUSEEVENTF_LEFTUP,
+    MIDDLE: MOUSEEVENTF_MIDDLEUP,
+    SECONDARY: MOUSEEVENTF_RIGHTUP,
+    RIGHT: MOUSEEVENTF_RIGHTUP,
+}
+_MOUSE_CLICK_EVENTS = {
+    PRIMARY: MOUSEEVENTF_LEFTCLICK,
+    LEFT: MOUSEEVENTF_LEFTCLICK,
+    MIDDLE: MOUSEEVENTF_MIDDLECLICK,
+    SECONDARY: MOUSEEVENTF_RIGHTCLICK,
+    RIGHT: MOUSEEVENTF_RIGHTCLICK,
+}
+_INVALID_BUTTON_MSG = 'button arg must be one of "%s", "%s", "%s", "%s" or "%s", not ' % (
+    LEFT, MIDDLE, RIGHT, PRIMARY, SECONDARY)
+
 # KeyBdInput Flags
 KEYEVENTF_EXTENDEDKEY = 0x0001
 KEYEVENTF_KEYUP = 0x0002
@@ -212,6 +246,9 @@ class Input(ctypes.Structure):
                 ("ii", Input_I)]
 
 
+_INPUT_SIZE = ctypes.sizeof(Input)
+
+
 # Fail Safe and Pause implementation
 
 class FailSafeException(Exception):
@@ -226,21 +263,44 @@ def failSafeCheck():
         )
 
 
-def _handlePause(_pause):
+def _handlePause(_pause, startTime=None):
     if _pause:
         assert isinstance(PAUSE, int) or isinstance(PAUSE, float)
-        time.sleep(PAUSE)
+        if PAUSE_MODE == "overlap" and startTime is not None:
+            remaining = PAUSE - (time.perf_counter() - startTime)
+            if remaining > 0:
+                time.sleep(remaining)
+        elif PAUSE:
+            # PAUSE = 0 turns the pause off, time.sleep(0) would still give up the rest of the thread's time slice
+            time.sleep(PAUSE)
+
+
+# Sleeps until one interval after deadline (the time the previous step was due) and returns the time this step is due,
+# to be passed back in for the next step. The interval loops schedule every step from the previous step's due time
+# instead of sleeping a fixed interval after every step, so the time spent sending inputs and the sleep overshoot
+# don't add up over a long sequence. If that time has already passed (e.g. a send stalled), the schedule restarts
+# from now and this step still waits the full interval, so a stall delays the remaining steps instead of letting
+# them all fire at once to catch up.
+def _sleep_interval(deadline, interval):
+    now = time.perf_counter()
+    deadline += interval
+    if deadline <= now:
+        deadline = now + interval
+    if deadline > now:
+        time.sleep(deadline - now)
+    return deadline
 
 
 # direct copy of _genericPyAutoGUIChecks()
 def _genericPyDirectInputChecks(wrappedFunction):
     @functools.wraps(wrappedFunction)
     def wrapper(*args, **kwargs):
+        startTime = time.perf_counter()
         funcArgs = inspect.getcallargs(wrappedFunction, *args, **kwargs)
 
         failSafeCheck()
         returnVal = wrappedFunction(*args, **kwargs)
-        _handlePause(funcArgs.get("_pause"))
+        _handlePause(funcArgs.get("_pause"), startTime)
         return returnVal
 
     return wrapper
@@ -248,8 +308,58 @@ def _genericPyDirectInputChecks(wrappedFunction):
 
 # Helper Functions
 
-def _to_windows_coordinates(x=0, y=0):
-    display_width, display_height = size()
+# Every input goes out through here, so that an open batch can queue it instead of sending it right away.
+# Returns the number of events inserted into the input stream (or queued).
+def _send_input(*inputs):
+    if _batch_buffer is not None:
+        _batch_buffer.extend(inputs)
+        return len(inputs)
+
+    # SendInput returns the number of event successfully inserted into input stream
+    # https://docs.microsoft.com/en-us/windows/win32/api/winuser/nf-winuser-sendinput#return-value
+    count = len(inputs)
+    if count == 1:
+        # a single input can be passed as it is, no array needed
+        return SendInput(1, ctypes.byref(inputs[0]), _INPUT_SIZE)
+    # otherwise the inputs are copied straight into one array of the right size
+    return SendInput(count, (Input * count)(*inputs), _INPUT_SIZE)
+
+
+def _create_mouse_input(dx=0, dy=0, dwFlags=0):
+    extra = ctypes.c_ulong(0)
+    ii_ = Input_I()
+    ii_.mi = MouseInput(dx, dy, 0, dwFlags, 0, ctypes.pointer(extra))
+    return Input(ctypes.c_ulong(0), ii_)
+
+
+# A button event always sends the same input, so these are built once here and shared by every call. _send_input()
+# copies inputs into the array it hands to SendInput(), so nothing ever writes to them.
+_MOUSE_BUTTON_INPUTS = {}
+for _events in (_MOUSE_DOWN_EVENTS, _MOUSE_UP_EVENTS, _MOUSE_CLICK_EVENTS):
+    for _ev in _events.values():
+        _MOUSE_BUTTON_INPUTS[_ev] = _create_mouse_input(dwFlags=_ev)
+del _events, _ev
+
+
+# screenSize can be passed in by callers that build several moves at once, so size() is only asked once.
+def _create_move_to_input(x=None, y=None, screenSize=None):
+    # if only x or y is provided, will keep the current position for the other axis. When both are given there is
+    # no need to ask Windows where the cursor is.
+    if x is None or y is None:
+        x, y = position(x, y)
+    x, y = _to_windows_coordinates(x, y, screenSize)
+    return _create_mouse_input(x, y, MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE)
+
+
+def _create_keyboard_input(wScan=0, dwFlags=0):
+    extra = ctypes.c_ulong(0)
+    ii_ = Input_I()
+    ii_.ki = KeyBdInput(0, wScan, dwFlags, 0, ctypes.pointer(extra))
+    return Input(ctypes.c_ulong(1), ii_)
+
+
+def _to_windows_coordinates(x=0, y=0, screenSize=None):
+    display_width, display_height = screenSize or size()
 
     # the +1 here prevents exactly mouse movements from sometimes ending up off by 1 pixel
     windows_x = (x * 65536) // display_width + 1
@@ -263,7 +373,8 @@ def _to_windows_coordinates(x=0, y=0):
 def position(x=None, y=None):
     cursor = POINT()
     ctypes.windll.user32.GetCursorPos(ctypes.byref(cursor))
-    return (x if x else cursor.x, y if y else cursor.y)
+    # only a missing (None) coordinate is filled in from the cursor, 0 is a valid coordinate like any other
+    return (cursor.x if x is None else x, cursor.y if y is None else y)
 
 
 # size() works exactly the same as PyAutoGUI. I've duplicated it here so that _to_windows_coordinates() can use it 
@@ -272,96 +383,105 @@ def size():
     return (ctypes.windll.user32.GetSystemMetrics(0), ctypes.windll.user32.GetSystemMetrics(1))
 
 
-# Main Mouse Functions
+# onScreen() works the same as PyAutoGUI's: x can also be an (x, y) tuple. Absolute moves are mapped onto the primary
+# monitor, so that is the screen checked here.
+def onScreen(x, y=None):
+    if y is None:
+        x, y = x
+    width, height = size()
+    return 0 <= x < width and 0 <= y < height
 
-# Ignored parameters: duration, tween, logScreenshot
-@_genericPyDirectInputChecks
-def mouseDown(x=None, y=None, button=PRIMARY, duration=None, tween=None, logScreenshot=None, _pause=True):
-    if not x is None or not y is None:
-        moveTo(x, y)
 
-    ev = None
-    if button == PRIMARY or button == LEFT:
-        ev = MOUSEEVENTF_LEFTDOWN
-    elif button == MIDDLE:
-        ev = MOUSEEVENTF_MIDDLEDOWN
-    elif button == SECONDARY or button == RIGHT:
-        ev = MOUSEEVENTF_RIGHTDOWN
+# Drags check their target up front, so a drag that can't end where it was asked to doesn't press the button at all.
+def _check_drag_target(x, y, screenSize=None):
+    width, height = screenSize or size()
+    if not (0 <= x < width and 0 <= y < height):
+        raise ValueError('drag target (%s, %s) is not on the screen %s' % (x, y, (width, height)))
+
 
+def _mouse_button_event(button, events):
+    try:
+        ev = events.get(button)
+    except TypeError:
+        # an unhashable button (e.g. a list) is just as invalid as an unknown name
+        ev = None
     if not ev:
-        raise ValueError('button arg to _click() must be one of "left", "middle", or "right", not %s' % button)
+        raise ValueError(_INVALID_BUTTON_MSG + repr(button))
+    return ev
 
-    extra = ctypes.c_ulong(0)
-    ii_ = Input_I()
-    ii_.mi = MouseInput(0, 0, 0, ev, 0, ctypes.pointer(extra))
-    x = Input(ctypes.c_ulong(0), ii_)
-    SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
 
+# Shared body of mouseDown(), mouseUp() and the click functions once the button event is known: move to x/y if given,
+# then send the event clicks times. The fixed-button click wrappers call this directly so they don't have to go
+# through a button lookup.
+def _mouse_button_op(x, y, ev, clicks=1, interval=0.0):
+    command = _MOUSE_BUTTON_INPUTS[ev]
 
-# Ignored parameters: duration, tween, logScreenshot
-@_genericPyDirectInputChecks
-def mouseUp(x=None, y=None, button=PRIMARY, duration=None, tween=None, logScreenshot=None, _pause=True):
+    # the move to x/y goes out in the same SendInput call as the first click, so nothing can get in between them
+    firstInputs = []
     if not x is None or not y is None:
-        moveTo(x, y)
+        firstInputs.append(_create_move_to_input(x, y))
+    if clicks > 0:
+        firstInputs.append(command)
+
+    # the first click goes out without waiting, every following click waits for the interval before it. The
+    # decorator has just done the fail-safe check, so it is only repeated before the following clicks.
+    deadline = time.perf_counter()
+    if firstInputs:
+        _send_input(*firstInputs)
+
+    # a single click (which is also what mouseDown and mouseUp send) is done at this point
+    if clicks <= 1:
+        return
 
-    ev = None
-    if button == PRIMARY or button == LEFT:
-        ev = MOUSEEVENTF_LEFTUP
-    elif button == MIDDLE:
-        ev = MOUSEEVENTF_MIDDLEUP
-    elif button == SECONDARY or button == RIGHT:
-        ev = MOUSEEVENTF_RIGHTUP
+    # bind the names used inside the loop to locals so each iteration doesn't go through the module globals
+    _failSafeCheck = failSafeCheck
+    _send = _send_input
+    _sleepInterval = _sleep_interval
 
-    if not ev:
-        raise ValueError('button arg to _click() must be one of "left", "middle", or "right", not %s' % button)
+    # _sleep_interval() doesn't sleep at all for an interval of 0, so there is no need to check for it on every click
+    for _ in itertools.repeat(None, clicks - 1):
+        deadline = _sleepInterval(deadline, interval)
+        _failSafeCheck()
+        _send(command)
 
-    extra = ctypes.c_ulong(0)
-    ii_ = Input_I()
-    ii_.mi = MouseInput(0, 0, 0, ev, 0, ctypes.pointer(extra))
-    x = Input(ctypes.c_ulong(0), ii_)
-    SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
 
+# Main Mouse Functions
 
 # Ignored parameters: duration, tween, logScreenshot
 @_genericPyDirectInputChecks
-def click(x=None, y=None, clicks=1, interval=0.0, button=PRIMARY, duration=None, tween=None, logScreenshot=None,
-          _pause=True):
-    if not x is None or not y is None:
-        moveTo(x, y)
-
-    ev = None
-    if button == PRIMARY or button == LEFT:
-        ev = MOUSEEVENTF_LEFTCLICK
-    elif button == MIDDLE:
-        ev = MOUSEEVENTF_MIDDLECLICK
-    elif button == SECONDARY or button == RIGHT:
-        ev = MOUSEEVENTF_RIGHTCLICK
+def mouseDown(x=None, y=None, button=PRIMARY, duration=None, tween=None, logScreenshot=None, _pause=True):
+    _mouse_button_op(x, y, _mouse_button_event(button, _MOUSE_DOWN_EVENTS))
 
-    if not ev:
-        raise ValueError('button arg to _click() must be one of "left", "middle", or "right", not %s' % button)
 
-    for i in range(clicks):
-        failSafeCheck()
+# Ignored parameters: duration, tween, logScreenshot
+@_genericPyDirectInputChecks
+def mouseUp(x=None, y=None, button=PRIMARY, duration=None, tween=None, logScreenshot=None, _pause=True):
+    _mouse_button_op(x, y, _mouse_button_event(button, _MOUSE_UP_EVENTS))
 
-        extra = ctypes.c_ulong(0)
-        ii_ = Input_I()
-        ii_.mi = MouseInput(0, 0, 0, ev, 0, ctypes.pointer(extra))
-        x = Input(ctypes.c_ulong(0), ii_)
-        SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
 
-        time.sleep(interval)
+# Ignored parameters: duration, tween, logScreenshot
+@_genericPyDirectInputChecks
+def click(x=None, y=None, clicks=1, interval=0.0, button=PRIMARY, duration=None, tween=None, logScreenshot=None,
+          _pause=True):
+    _mouse_button_op(x, y, _mouse_button_event(button, _MOUSE_CLICK_EVENTS), clicks, interval)
 
 
+# Ignored parameters: duration, tween, logScreenshot
+@_genericPyDirectInputChecks
 def leftClick(x=None, y=None, interval=0.0, duration=0.0, tween=None, logScreenshot=None, _pause=True):
-    click(x, y, 1, interval, LEFT, duration, tween, logScreenshot, _pause)
+    _mouse_button_op(x, y, MOUSEEVENTF_LEFTCLICK, 1, interval)
 
 
+# Ignored parameters: duration, tween, logScreenshot
+@_genericPyDirectInputChecks
 def rightClick(x=None, y=None, interval=0.0, duration=0.0, tween=None, logScreenshot=None, _pause=True):
-    click(x, y, 1, interval, RIGHT, duration, tween, logScreenshot, _pause)
+    _mouse_button_op(x, y, MOUSEEVENTF_RIGHTCLICK, 1, interval)
 
 
+# Ignored parameters: duration, tween, logScreenshot
+@_genericPyDirectInputChecks
 def middleClick(x=None, y=None, interval=0.0, duration=0.0, tween=None, logScreenshot=None, _pause=True):
-    click(x, y, 1, interval, MIDDLE, duration, tween, logScreenshot, _pause)
+    _mouse_button_op(x, y, MOUSEEVENTF_MIDDLECLICK, 1, interval)
 
 
 def doubleClick(x=None, y=None, interval=0.0, button=LEFT, duration=0.0, tween=None, logScreenshot=None, _pause=True):
@@ -383,16 +503,10 @@ def tripleClick(x=None, y=None, interval=0.0, button=LEFT, duration=0.0, tween=N
 @_genericPyDirectInputChecks
 def moveTo(x=None, y=None, duration=None, tween=None, logScreenshot=False, _pause=True, relative=False):
     if not relative:
-        x, y = position(x, y)  # if only x or y is provided, will keep the current position for the other axis
-        x, y = _to_windows_coordinates(x, y)
-        extra = ctypes.c_ulong(0)
-        ii_ = Input_I()
-        ii_.mi = MouseInput(x, y, 0, (MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE), 0, ctypes.pointer(extra))
-        command = Input(ctypes.c_ulong(0), ii_)
-        SendInput(1, ctypes.pointer(command), ctypes.sizeof(command))
+        _send_input(_create_move_to_input(x, y))
     else:
         currentX, currentY = position()
-        moveRel(x - currentX, y - currentY, relative=True)
+        _send_input(_create_mouse_input(x - currentX, y - currentY, MOUSEEVENTF_MOVE))
 
 
 # Ignored parameters: duration, tween, logScreenshot
@@ -407,7 +521,7 @@ def moveRel(xOffset=None, yOffset=None, duration=None, tween=None, logScreenshot
             xOffset = 0
         if yOffset is None:
             yOffset = 0
-        moveTo(x + xOffset, y + yOffset)
+        _send_input(_create_move_to_input(x + xOffset, y + yOffset))
     else:
         # When using MOUSEEVENTF_MOVE for relative movement the results may be inconsistent.
         # "Relative mouse motion is subject to the effects of the mouse speed and the two-mouse threshold values. A user
@@ -415,156 +529,516 @@ def moveRel(xOffset=None, yOffset=None, duration=None, tween=None, logScreenshot
         # obtain and set these values using the SystemParametersInfo function." 
         # https://docs.microsoft.com/en-us/windows/win32/api/winuser/ns-winuser-mouseinput
         # https://stackoverflow.com/questions/50601200/pyhon-directinput-mouse-relative-moving-act-not-as-expected
-        extra = ctypes.c_ulong(0)
-        ii_ = Input_I()
-        ii_.mi = MouseInput(xOffset, yOffset, 0, MOUSEEVENTF_MOVE, 0, ctypes.pointer(extra))
-        command = Input(ctypes.c_ulong(0), ii_)
-        SendInput(1, ctypes.pointer(command), ctypes.sizeof(command))
+        _send_input(_create_mouse_input(xOffset, yOffset, MOUSEEVENTF_MOVE))
 
 
 move = moveRel
 
 
-# Missing feature: drag functions
+# Shared body of the drag functions: press the button, make the moves and release the button again, all in a single
+# SendInput call.
+def _drag(moveInputs, button, mouseDownUp):
+    if not mouseDownUp:
+        _send_input(*moveInputs)
+        return
 
+    downInput = _MOUSE_BUTTON_INPUTS[_mouse_button_event(button, _MOUSE_DOWN_EVENTS)]
+    upInput = _MOUSE_BUTTON_INPUTS[_mouse_button_event(button, _MOUSE_UP_EVENTS)]
+    _send_input(*([downInput] + moveInputs + [upInput]))
 
-# Keyboard Functions
+
+# Ignored parameters: duration, tween, logScreenshot
+# The button press, the move and the button release are sent together, so nothing can get in between them. A drag
+# that isn't relative must end on the screen, otherwise ValueError is raised before any input is sent. With
+# mouseDownUp=False only the move is made (without the screen check), which is the same as moveTo().
+# Use the relative flag to do a raw win32 api relative movement call (no MOUSEEVENTF_ABSOLUTE flag), see moveTo().
+@_genericPyDirectInputChecks
+def dragTo(x=None, y=None, duration=0.0, tween=None, button=PRIMARY, logScreenshot=None, _pause=True,
+           mouseDownUp=True, relative=False):
+    if not relative:
+        if x is None or y is None:
+            x, y = position(x, y)
+        screenSize = size()
+        if mouseDownUp:
+            _check_drag_target(x, y, screenSize)
+        moveInput = _create_move_to_input(x, y, screenSize)
+    else:
+        currentX, currentY = position()
+        if x is None:
+            x = currentX
+        if y is None:
+            y = currentY
+        moveInput = _create_mouse_input(x - currentX, y - currentY, MOUSEEVENTF_MOVE)
+    _drag([moveInput], button, mouseDownUp)
+
+
+# Ignored parameters: duration, tween, logScreenshot
+# drag() and dragRel() are equivalent.
+# Use the relative flag to do a raw win32 api relative movement call (no MOUSEEVENTF_ABSOLUTE flag), see moveRel().
+@_genericPyDirectInputChecks
+def dragRel(xOffset=0, yOffset=0, duration=0.0, tween=None, button=PRIMARY, logScreenshot=None, _pause=True,
+            mouseDownUp=True, relative=False):
+    if xOffset is None:
+        xOffset = 0
+    if yOffset is None:
+        yOffset = 0
+    if not relative:
+        x, y = position()
+        x += xOffset
+        y += yOffset
+        screenSize = size()
+        if mouseDownUp:
+            _check_drag_target(x, y, screenSize)
+        moveInput = _create_move_to_input(x, y, screenSize)
+    else:
+        moveInput = _create_mouse_input(xOffset, yOffset, MOUSEEVENTF_MOVE)
+    _drag([moveInput], button, mouseDownUp)
+
+
+drag = dragRel
 
 
 # Ignored parameters: logScreenshot
-# Missing feature: auto shift for special characters (ie. '!', '@', '#'...)
+# Drags along a path of (xOffset, yOffset) steps, each one relative to where the previous step ended. Instead of a
+# dragRel() per step, which would release and press the button again in between, the button is pressed once before
+# the first step and released once after the last one, and the whole path goes out in a single SendInput call.
+# Use the relative flag to do raw win32 api relative movement calls (no MOUSEEVENTF_ABSOLUTE flag), see moveRel().
 @_genericPyDirectInputChecks
-def keyDown(key, logScreenshot=None, _pause=True):
-    if not key in KEYBOARD_MAPPING or KEYBOARD_MAPPING[key] is None:
+def dragPath(offsets, button=PRIMARY, logScreenshot=None, _pause=True, mouseDownUp=True, relative=False):
+    moveInputs = []
+    if not relative:
+        x, y = position()
+        # the screen size is the same for every step, so it is only asked for once
+        screenSize = size()
+        for xOffset, yOffset in offsets:
+            x += xOffset
+            y += yOffset
+            if mouseDownUp:
+                _check_drag_target(x, y, screenSize)
+            moveInputs.append(_create_move_to_input(x, y, screenSize))
+    else:
+        for xOffset, yOffset in offsets:
+            moveInputs.append(_create_mouse_input(xOffset, yOffset, MOUSEEVENTF_MOVE))
+
+    # an empty path has nowhere to drag to, so don't press the button at all (that would just be a click)
+    if not moveInputs:
         return
+    _drag(moveInputs, button, mouseDownUp)
 
-    keybdFlags = KEYEVENTF_SCANCODE
 
-    # Init event tracking
-    insertedEvents = 0
-    expectedEvents = 1
+# Keyboard Functions
+
+
+# Keyboard inputs by (scancode, flags). A key event always sends the same input, so they are shared like the mouse
+# button inputs. Every key in KEYBOARD_MAPPING is built at import, anything added to the mapping later is built on
+# first use.
+_KEYBOARD_INPUTS = {}
+
+# keys that need the extended key flag (and the 0xE0 prefix while numlock is on)
+_EXTENDED_KEYS = frozenset(['up', 'left', 'down', 'right'])
+
+
+def _keyboard_input(wScan, dwFlags):
+    keyboardInput = _KEYBOARD_INPUTS.get((wScan, dwFlags))
+    if keyboardInput is None:
+        keyboardInput = _KEYBOARD_INPUTS[(wScan, dwFlags)] = _create_keyboard_input(wScan, dwFlags)
+    return keyboardInput
+
+
+for _key, _hexKeyCode in KEYBOARD_MAPPING.items():
+    if _hexKeyCode is not None:
+        _keybdFlags = KEYEVENTF_SCANCODE
+        if _key in _EXTENDED_KEYS:
+            _keybdFlags |= KEYEVENTF_EXTENDEDKEY
+        _keyboard_input(_hexKeyCode, _keybdFlags)
+        _keyboard_input(_hexKeyCode, _keybdFlags | KEYEVENTF_KEYUP)
+_keyboard_input(0xE0, KEYEVENTF_SCANCODE)
+_keyboard_input(0xE0, KEYEVENTF_SCANCODE | KEYEVENTF_KEYUP)
+del _key, _hexKeyCode, _keybdFlags
+
+
+# The inputs a key sends when it goes down / up, or None if the key is not in KEYBOARD_MAPPING.
+def _key_down_inputs(key):
+    hexKeyCode = KEYBOARD_MAPPING.get(key)
+    if hexKeyCode is None:
+        return None
+
+    keybdFlags = KEYEVENTF_SCANCODE
+    inputs = []
 
     # arrow keys need the extended key flag
-    if key in ['up', 'left', 'down', 'right']:
+    if key in _EXTENDED_KEYS:
         keybdFlags |= KEYEVENTF_EXTENDEDKEY
         # if numlock is on and an arrow key is being pressed, we need to send an additional scancode
         # https://stackoverflow.com/questions/14026496/sendinput-sends-num8-when-i-want-to-send-vk-up-how-come
         # https://handmade.network/wiki/2823-keyboard_inputs_-_scancodes,_raw_input,_text_input,_key_names
         if ctypes.windll.user32.GetKeyState(0x90):
-            # We need to press two keys, so we expect to have inserted 2 events when done
-            expectedEvents = 2
-            hexKeyCode = 0xE0
-            extra = ctypes.c_ulong(0)
-            ii_ = Input_I()
-            ii_.ki = KeyBdInput(0, hexKeyCode, KEYEVENTF_SCANCODE, 0, ctypes.pointer(extra))
-            x = Input(ctypes.c_ulong(1), ii_)
-
-            # SendInput returns the number of event successfully inserted into input stream
-            # https://docs.microsoft.com/en-us/windows/win32/api/winuser/nf-winuser-sendinput#return-value
-            insertedEvents += SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
-
-    hexKeyCode = KEYBOARD_MAPPING[key]
-    extra = ctypes.c_ulong(0)
-    ii_ = Input_I()
-    ii_.ki = KeyBdInput(0, hexKeyCode, keybdFlags, 0, ctypes.pointer(extra))
-    x = Input(ctypes.c_ulong(1), ii_)
-    insertedEvents += SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+            inputs.append(_keyboard_input(0xE0, KEYEVENTF_SCANCODE))
 
-    return insertedEvents == expectedEvents
+    inputs.append(_keyboard_input(hexKeyCode, keybdFlags))
+    return inputs
 
 
-# Ignored parameters: logScreenshot
-# Missing feature: auto shift for special characters (ie. '!', '@', '#'...)
-@_genericPyDirectInputChecks
-def keyUp(key, logScreenshot=None, _pause=True):
-    if not key in KEYBOARD_MAPPING or KEYBOARD_MAPPING[key] is None:
-        return
+def _key_up_inputs(key):
+    hexKeyCode = KEYBOARD_MAPPING.get(key)
+    if hexKeyCode is None:
+        return None
 
     keybdFlags = KEYEVENTF_SCANCODE | KEYEVENTF_KEYUP
 
-    # Init event tracking
-    insertedEvents = 0
-    expectedEvents = 1
-
     # arrow keys need the extended key flag
-    if key in ['up', 'left', 'down', 'right']:
+    isArrowKey = key in _EXTENDED_KEYS
+    if isArrowKey:
         keybdFlags |= KEYEVENTF_EXTENDEDKEY
 
-    hexKeyCode = KEYBOARD_MAPPING[key]
-    extra = ctypes.c_ulong(0)
-    ii_ = Input_I()
-    ii_.ki = KeyBdInput(0, hexKeyCode, keybdFlags, 0, ctypes.pointer(extra))
-    x = Input(ctypes.c_ulong(1), ii_)
-
-    # SendInput returns the number of event successfully inserted into input stream
-    # https://docs.microsoft.com/en-us/windows/win32/api/winuser/nf-winuser-sendinput#return-value
-    insertedEvents += SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+    inputs = [_keyboard_input(hexKeyCode, keybdFlags)]
 
     # if numlock is on and an arrow key is being pressed, we need to send an additional scancode
     # https://stackoverflow.com/questions/14026496/sendinput-sends-num8-when-i-want-to-send-vk-up-how-come
     # https://handmade.network/wiki/2823-keyboard_inputs_-_scancodes,_raw_input,_text_input,_key_names
-    if key in ['up', 'left', 'down', 'right'] and ctypes.windll.user32.GetKeyState(0x90):
-        # We need to press two keys, so we expect to have inserted 2 events when done
-        expectedEvents = 2
-        hexKeyCode = 0xE0
-        extra = ctypes.c_ulong(0)
-        ii_ = Input_I()
-        ii_.ki = KeyBdInput(0, hexKeyCode, KEYEVENTF_SCANCODE | KEYEVENTF_KEYUP, 0, ctypes.pointer(extra))
-        x = Input(ctypes.c_ulong(1), ii_)
-        insertedEvents += SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+    if isArrowKey and ctypes.windll.user32.GetKeyState(0x90):
+        inputs.append(_keyboard_input(0xE0, KEYEVENTF_SCANCODE | KEYEVENTF_KEYUP))
+    return inputs
 
-    return insertedEvents == expectedEvents
 
+# keyDown(), keyUp() and press() are thin decorated wrappers around these, so that press() and typewrite() can send
+# their keys without going through the fail-safe/pause decorator (and its PAUSE sleep) once per key event.
+def _key_down(key):
+    inputs = _key_down_inputs(key)
+    if inputs is None:
+        return
 
-# Ignored parameters: logScreenshot
-# nearly identical to PyAutoGUI's implementation
-@_genericPyDirectInputChecks
-def press(keys, presses=1, interval=0.0, logScreenshot=None, _pause=True):
-    if type(keys) == str:
+    # all of the key's events (2 for an arrow key with numlock on) go out together and must all be inserted
+    return _send_input(*inputs) == len(inputs)
+
+
+def _key_up(key):
+    inputs = _key_up_inputs(key)
+    if inputs is None:
+        return
+
+    return _send_input(*inputs) == len(inputs)
+
+
+# Turns the keys argument of press() and hold() into a list of key names, lowercasing the multi-character ones
+def _normalize_keys(keys):
+    # key names are always plain str, so an identity check on the type is enough
+    if type(keys) is str:
         if len(keys) > 1:
             keys = keys.lower()
-        keys = [keys]  # If keys is 'enter', convert it to ['enter'].
-    else:
-        lowerKeys = []
-        for s in keys:
-            if len(s) > 1:
-                lowerKeys.append(s.lower())
-            else:
-                lowerKeys.append(s)
-        keys = lowerKeys
-    interval = float(interval)
+        return [keys]  # If keys is 'enter', convert it to ['enter'].
+
+    return [s.lower() if len(s) > 1 else s for s in keys]
 
+
+# keys must already be a list of lowercased key names, see _normalize_keys()
+# duration is how long each key is held down between its down and up event.
+def _press(keys, presses, interval, duration):
     # We need to press x keys y times, which comes out to x*y presses in total
     expectedPresses = presses * len(keys)
     completedPresses = 0
 
-    for i in range(presses):
+    # nothing to press, so nothing can fail
+    if presses == 0 or not keys:
+        return True
+    # a negative number of presses is never completed: no press is made, which is not the (negative) number expected
+    if presses < 0:
+        return False
+
+    # Without an interval or a hold duration there is nothing to wait for between the key events, so every down and
+    # up event of every press is sent with a single SendInput call.
+    if not interval and not duration:
+        _downInputs = _key_down_inputs
+        _upInputs = _key_up_inputs
+        keyInputs = []
+        validKeys = 0
         for k in keys:
-            failSafeCheck()
-            downed = keyDown(k)
-            upped = keyUp(k)
-            # Count key press as complete if key was "downed" and "upped" successfully
+            downInputs = _downInputs(k)
+            if downInputs is None:
+                continue
+            keyInputs.extend(downInputs)
+            keyInputs.extend(_upInputs(k))
+            validKeys += 1
+
+        # the decorator of press() / typewrite() has just done the fail-safe check and nothing was sent since
+        inputs = keyInputs * presses
+        if inputs:
+            if _send_input(*inputs) != len(inputs):
+                return False
+        return validKeys * presses == expectedPresses
+
+    # look every key up once, not once per press. Keys that aren't in KEYBOARD_MAPPING are left out, they can never
+    # complete a press.
+    keyInputs = []
+    for k in keys:
+        downInputs = _key_down_inputs(k)
+        if downInputs is not None:
+            keyInputs.append((downInputs, _key_up_inputs(k)))
+
+    # bind the names used inside the loop to locals so each iteration doesn't go through the module globals
+    _failSafeCheck = failSafeCheck
+    _send = _send_input
+    _sleep = time.sleep
+    _sleepInterval = _sleep_interval
+
+    # the first press goes out without waiting, every following press waits for the interval before it
+    deadline = time.perf_counter()
+    for downInputs, upInputs in keyInputs:
+        _failSafeCheck()
+        downed = _send(*downInputs) == len(downInputs)
+        if duration:
+            _sleep(duration)
+        upped = _send(*upInputs) == len(upInputs)
+        # Count key press as complete if key was "downed" and "upped" successfully
+        if downed and upped:
+            completedPresses += 1
+
+    for _ in itertools.repeat(None, presses - 1):
+        deadline = _sleepInterval(deadline, interval)
+        for downInputs, upInputs in keyInputs:
+            _failSafeCheck()
+            downed = _send(*downInputs) == len(downInputs)
+            if duration:
+                _sleep(duration)
+            upped = _send(*upInputs) == len(upInputs)
             if downed and upped:
                 completedPresses += 1
 
-        time.sleep(interval)
-
     return completedPresses == expectedPresses
 
 
+# Ignored parameters: logScreenshot
+# Missing feature: auto shift for special characters (ie. '!', '@', '#'...)
+@_genericPyDirectInputChecks
+def keyDown(key, logScreenshot=None, _pause=True):
+    return _key_down(key)
+
+
+# Ignored parameters: logScreenshot
+# Missing feature: auto shift for special characters (ie. '!', '@', '#'...)
+@_genericPyDirectInputChecks
+def keyUp(key, logScreenshot=None, _pause=True):
+    return _key_up(key)
+
+
 # Ignored parameters: logScreenshot
 # nearly identical to PyAutoGUI's implementation
+# duration is how long each key is held down. The default (None) holds it for PAUSE, the same as calling keyDown() and
+# then keyUp(); games that poll the keyboard state can miss a key that goes down and up at the same moment. With
+# duration=0 all of the key events go out together in a single SendInput call.
 @_genericPyDirectInputChecks
-def typewrite(message, interval=0.0, logScreenshot=None, _pause=True):
+def press(keys, presses=1, interval=0.0, logScreenshot=None, _pause=True, duration=None):
+    keys = _normalize_keys(keys)
     interval = float(interval)
-    for c in message:
-        if len(c) > 1:
-            c = c.lower()
-        press(c, _pause=False)
-        time.sleep(interval)
-        failSafeCheck()
+    duration = PAUSE if duration is None else float(duration)
+
+    return _press(keys, presses, interval, duration)
+
+
+# Ignored parameters: logScreenshot
+# nearly identical to PyAutoGUI's implementation
+# duration is how long each key is held down, see press().
+@_genericPyDirectInputChecks
+def typewrite(message, interval=0.0, logScreenshot=None, _pause=True, duration=None):
+    interval = float(interval)
+    duration = PAUSE if duration is None else float(duration)
+    keys = [c.lower() if len(c) > 1 else c for c in message]
+    if not keys:
+        return
+
+    # Without an interval the whole message is pressed like one press() of all its keys (a single SendInput call when
+    # there is no hold duration either)
+    if not interval:
+        _press(keys, 1, 0.0, duration)
+        return
+
+    # look every character up once before the loop, so each one is sent straight from here instead of going through
+    # _press() and its key lookups. Characters that aren't in KEYBOARD_MAPPING send nothing but still get their
+    # interval.
+    charInputs = []
+    for k in keys:
+        downInputs = _key_down_inputs(k)
+        charInputs.append(None if downInputs is None else (downInputs, _key_up_inputs(k)))
+
+    # bind the names used inside the loop to locals so each character doesn't go through the module globals
+    _failSafeCheck = failSafeCheck
+    _send = _send_input
+    _sleep = time.sleep
+    _sleepInterval = _sleep_interval
+
+    # the first character goes out without waiting, every following character waits for the interval before it. The
+    # decorator has just done the fail-safe check, so it is only repeated before the following characters.
+    deadline = time.perf_counter()
+    inputs = charInputs[0]
+    if inputs is not None:
+        _send(*inputs[0])
+        if duration:
+            _sleep(duration)
+        _send(*inputs[1])
+
+    for inputs in itertools.islice(charInputs, 1, None):
+        deadline = _sleepInterval(deadline, interval)
+        if inputs is not None:
+            _failSafeCheck()
+            _send(*inputs[0])
+            if duration:
+                _sleep(duration)
+            _send(*inputs[1])
 
 
 write = typewrite
 
-# Missing feature: hotkey functions
+
+# The context manager returned by hold(). Written out as a class instead of a @contextlib.contextmanager generator,
+# which would add a generator frame and its next()/throw() handling to every with statement.
+class _Hold(object):
+    __slots__ = ('keys', 'pause')
+
+    def __init__(self, keys, pause):
+        self.keys = keys
+        self.pause = pause
+
+    def __enter__(self):
+        downInputs = []
+        for k in self.keys:
+            keyInputs = _key_down_inputs(k)
+            if keyInputs is not None:
+                downInputs.extend(keyInputs)
+
+        failSafeCheck()
+        if downInputs:
+            _send_input(*downInputs)
+
+    def __exit__(self, excType, excValue, traceback):
+        upInputs = []
+        for k in reversed(self.keys):
+            keyInputs = _key_up_inputs(k)
+            if keyInputs is not None:
+                upInputs.extend(keyInputs)
+        if upInputs:
+            _send_input(*upInputs)
+        _handlePause(self.pause)
+        return False
+
+
+# Ignored parameters: logScreenshot
+# Works like PyAutoGUI's hold(): the keys are held down for the duration of the with block and released when it ends,
+# here in reverse order so that modifiers held first are let go of last. All the key downs go out in a single
+# SendInput call, and so do all the key ups.
+def hold(keys, logScreenshot=None, _pause=True):
+    return _Hold(_normalize_keys(keys), _pause)
+
+
+# Ignored parameters: logScreenshot
+# Works like PyAutoGUI's hotkey(): presses the keys down in order and releases them in reverse order. The keys can
+# also be passed as a single list. wait is how long the keys stay held down together before they are released.
+# Without an interval all the key downs go out in a single SendInput call, and so do all the key ups.
+@_genericPyDirectInputChecks
+def hotkey(*args, interval=0.0, wait=0.0, logScreenshot=None, _pause=True):
+    if len(args) == 1 and type(args[0]) is not str:
+        args = args[0]  # hotkey(['ctrl', 'c']) is the same as hotkey('ctrl', 'c')
+    keys = _normalize_keys(args)
+    if not keys:
+        return True
+    interval = float(interval)
+
+    if not interval:
+        downInputs = []
+        validKeys = 0
+        for k in keys:
+            keyInputs = _key_down_inputs(k)
+            if keyInputs is not None:
+                downInputs.extend(keyInputs)
+                validKeys += 1
+        insertedEvents = _send_input(*downInputs) if downInputs else 0
+
+        if wait:
+            time.sleep(wait)
+
+        upInputs = []
+        for k in reversed(keys):
+            keyInputs = _key_up_inputs(k)
+            if keyInputs is not None:
+                upInputs.extend(keyInputs)
+        if upInputs:
+            insertedEvents += _send_input(*upInputs)
+
+        return validKeys == len(keys) and insertedEvents == len(downInputs) + len(upInputs)
+
+    completed = True
+    deadline = time.perf_counter()
+    for k in keys:
+        failSafeCheck()
+        if not _key_down(k):
+            completed = False
+        deadline = _sleep_interval(deadline, interval)
+
+    if wait:
+        deadline = _sleep_interval(deadline, wait)
+
+    # the keys stay down for the interval after the last one is pressed, but there is nothing to wait for after the
+    # last one is released
+    releaseKeys = keys[::-1]
+    failSafeCheck()
+    if not _key_up(releaseKeys[0]):
+        completed = False
+    for k in itertools.islice(releaseKeys, 1, None):
+        deadline = _sleep_interval(deadline, interval)
+        failSafeCheck()
+        if not _key_up(k):
+            completed = False
+
+    return completed
+
+
+# Batching Functions
+
+# Between beginBatch() and endBatch() no input is sent. Everything the mouse and keyboard functions would send is
+# queued instead, and endBatch() hands the whole queue to a single SendInput() call. Windows inserts the events of one
+# SendInput() call back to back, so nothing else (including the real mouse and keyboard) can get in between them.
+# Keep in mind that intervals, pauses and sleeps inside a batch still take time in your script, but they no longer
+# separate the events, and that position() and the fail-safe check still see where the cursor is now, not where the
+# queued moves will put it.
+# There is only one batch for the whole module, like PAUSE and FAILSAFE are module-wide settings: while a batch is
+# open, the input of every thread is queued into it, not just the input of the thread that opened it. Don't open a
+# batch while other threads are sending input that has to go out right away.
+def beginBatch():
+    global _batch_buffer
+    if _batch_buffer is not None:
+        return False  # a batch is already open, keep adding to it
+    _batch_buffer = []
+    return True
+
+
+def endBatch():
+    global _batch_buffer
+    if _batch_buffer is None:
+        return True
+    inputs, _batch_buffer = _batch_buffer, None
+    if not inputs:
+        return True
+    return _send_input(*inputs) == len(inputs)
+
+
+# The context manager returned by inputBatch(). Written out as a class for the same reason as _Hold.
+class _InputBatch(object):
+    __slots__ = ('started',)
+
+    def __enter__(self):
+        # a with block inside an already open batch only adds to it, the outer one sends it
+        self.started = beginBatch()
+
+    def __exit__(self, excType, excValue, traceback):
+        global _batch_buffer
+        if self.started:
+            if excType is None:
+                endBatch()
+            else:
+                _batch_buffer = None
+        return False
+
+
+# Context manager version of beginBatch()/endBatch(). If the block raises, the queued inputs are dropped instead of
+# sent, so a half-finished sequence (e.g. a mouseDown without its mouseUp) never reaches the application.
+def inputBatch():
+    return _InputBatch()
@@ -3,16 +3,26 @@ import time
 import pydirectinput
 
 
+# Waits between test steps are measured from one running deadline instead of from whenever the previous step
+# finished, so the time the inputs themselves take (including PAUSE) doesn't stretch a replay like wasd_movement() out.
+_deadline = time.perf_counter()
+
+
+def wait(seconds):
+    global _deadline
+    _deadline = pydirectinput._sleep_interval(_deadline, seconds)
+
+
 def trace_square():
     # trace a box with the mouse movement
     pydirectinput.moveTo(300, 300)
-    time.sleep(1)
+    wait(1)
     pydirectinput.moveTo(400, 300)
-    time.sleep(1)
+    wait(1)
     pydirectinput.moveTo(400, 400)
-    time.sleep(1)
+    wait(1)
     pydirectinput.moveTo(300, 400)
-    time.sleep(1)
+    wait(1)
     pydirectinput.moveTo(300, 300)
 
 
@@ -20,34 +30,34 @@ def mouse_return_accuracy():
     # when the mouse is moved relative, and then reversed relative again, confirm 
     # that the cursor returns to the same position
     pydirectinput.moveTo(300, 300)
-    time.sleep(1)
+    wait(1)
     pydirectinput.move(100, 0)
-    time.sleep(1)
+    wait(1)
     pydirectinput.move(-100, 0)
 
 
 def clicks_and_typing():
     pydirectinput.moveTo(500, 300)
-    time.sleep(1)
+    wait(1)
     pydirectinput.click(500, 400)
     pydirectinput.keyDown('g')
-    time.sleep(0.05)
+    wait(0.05)
     pydirectinput.keyUp('g')
-    time.sleep(0.05)
+    wait(0.05)
     pydirectinput.press(['c','v','t'])
-    time.sleep(0.05)
+    wait(0.05)
     pydirectinput.typewrite('myword')
 
 
 def wasd_movement():
     pydirectinput.keyDown('w')
-    time.sleep(1)
+    wait(1)
     pydirectinput.keyUp('w')
-    time.sleep(1)
+    wait(1)
     pydirectinput.keyDown('d')
-    time.sleep(0.25)
+    wait(0.25)
     pydirectinput.keyUp('d')
-    time.sleep(1)
+    wait(1)
     pydirectinput.move(300, None)
 
 
@@ -57,49 +67,96 @@ def basic_click():
 
 def arrow_keys():
     pydirectinput.keyDown('left')
-    time.sleep(0.25)
+    wait(0.25)
     pydirectinput.keyUp('left')
-    time.sleep(1)
+    wait(1)
     pydirectinput.keyDown('right')
-    time.sleep(0.25)
+    wait(0.25)
     pydirectinput.keyUp('right')
-    time.sleep(1)
+    wait(1)
     pydirectinput.keyDown('down')
-    time.sleep(0.25)
+    wait(0.25)
     pydirectinput.keyUp('down')
-    time.sleep(1)
+    wait(1)
     pydirectinput.keyDown('up')
-    time.sleep(0.25)
+    wait(0.25)
     pydirectinput.keyUp('up')
-    time.sleep(1)
+    wait(1)
 
 
 def relative_mouse():
     pydirectinput.moveRel(0, 400, relative=True)
-    time.sleep(1)
+    wait(1)
     pydirectinput.moveRel(0, -400, relative=True)
-    time.sleep(1)
+    wait(1)
     pydirectinput.moveRel(-50, -50, relative=True)
-    time.sleep(3)
+    wait(3)
     pydirectinput.moveTo(1150, 0, relative=True)
 
 
+def hold_shift():
+    # typed while shift is held down, so this should come out as 'HOLD'
+    with pydirectinput.hold('shift'):
+        pydirectinput.typewrite('hold')
+
+
+def hotkey_copy_paste():
+    # select all, copy and paste the text back in twice
+    pydirectinput.hotkey('ctrl', 'a')
+    wait(1)
+    pydirectinput.hotkey(['ctrl', 'c'])
+    wait(1)
+    pydirectinput.press('end')
+    pydirectinput.hotkey('ctrl', 'v', interval=0.05)
+    pydirectinput.hotkey('ctrl', 'v', wait=0.25)
+
+
+def drag_box():
+    # drag out a selection box, then drag it back by the same amount with relative drags
+    pydirectinput.moveTo(300, 300)
+    wait(1)
+    pydirectinput.dragTo(400, 400)
+    wait(1)
+    pydirectinput.dragRel(-100, -100)
+    wait(1)
+    pydirectinput.drag(100, 100, relative=True)
+    wait(1)
+    # the same square as trace_square(), but with the button held down for the whole path
+    pydirectinput.dragPath([(100, 0), (0, 100), (-100, 0), (0, -100)])
+
+
+def batched_inputs():
+    # the move, the click and the typing are queued and reach the application in a single SendInput call
+    with pydirectinput.inputBatch():
+        pydirectinput.moveTo(500, 300, _pause=False)
+        pydirectinput.click(_pause=False)
+        pydirectinput.typewrite('batched', _pause=False, duration=0)
+
+
 if __name__ == '__main__':
     
-    time.sleep(4)
+    wait(4)
     #trace_square()
-    #time.sleep(1)
+    #wait(1)
     #mouse_return_accuracy()
-    #time.sleep(1)
+    #wait(1)
     #clicks_and_typing()
-    #time.sleep(6)
+    #wait(6)
     #wasd_movement()
-    #time.sleep(1)
+    #wait(1)
     #basic_click()
-    #time.sleep(6)
+    #wait(6)
     #arrow_keys()
-    time.sleep(1)
+    wait(1)
     relative_mouse()
+    #wait(1)
+    #hold_shift()
+    #wait(1)
+    #hotkey_copy_paste()
+    #wait(1)
+    #drag_box()
+    #wait(1)
+    #batched_inputs()
 
     
     